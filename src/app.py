@@ -4,9 +4,88 @@ MVP Placeholder UI Structure
 """
 
 import streamlit as st
+import asyncio
 import tempfile
+import hashlib
+import io
 import os
+import re
+import librosa
+import numpy as np
+import orjson
+import pandas as pd
+import soundfile as sf
 from datetime import datetime
+from numba import njit
+from openai import AsyncOpenAI, OpenAI
+from pydantic import BaseModel, ConfigDict, Field
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+def audio_key(audio_bytes: bytes) -> str:
+    """Content hash used as the analysis cache key.
+
+    BLAKE3 is SIMD-accelerated (~3GB/s) and hashes a 25MB clip in ~1ms;
+    fall back to hashlib's SHA-256 (OpenSSL, SHA-NI where available)
+    when the blake3 wheel isn't installed.
+    """
+    if blake3 is not None:
+        return blake3(audio_bytes).hexdigest()
+    return hashlib.sha256(audio_bytes).hexdigest()
+
+# Pauses longer than this (seconds) count as "long pauses" in the metrics
+LONG_PAUSE_THRESHOLD = 1.0
+
+# All audio is decoded once to this rate - the format Whisper prefers
+SAMPLE_RATE = 16000
+
+# Sidebar navigation labels (hoisted so they aren't rebuilt per rerun)
+NAV_PAGES = ("Record & Analyze", "Practice History", "Mock Interview", "Settings")
+
+# Whisper API upload ceiling
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Saved analysis sessions live here as JSON
+SESSIONS_DIR = "data/sessions"
+
+def save_session(path: str, results: dict) -> None:
+    """Persist an analysis results dict as JSON.
+
+    orjson serializes numpy scalars natively (OPT_SERIALIZE_NUMPY), so
+    metric values never need boxing through a custom default hook.
+    """
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+
+def load_session(path: str) -> dict:
+    """Load a previously saved analysis session"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+# Compiled once at import: a single linear scan over the transcript is far
+# cheaper than a Python-level loop checking each word against a set
+FILLER_RE = re.compile(
+    r"\b(?:um+|uh+|er+|like|you know|i mean|so|actually|basically)\b",
+    re.IGNORECASE
+)
+
+class CoachingFeedback(BaseModel):
+    """Structured coaching feedback returned by the LLM"""
+    # frozen + forbid lets pydantic-core skip mutability bookkeeping and
+    # makes the schema strict (additionalProperties: false)
+    model_config = ConfigDict(frozen=True, extra="forbid", validate_assignment=False)
+
+    strengths: tuple[str, ...] = Field(description="List of positive aspects observed")
+    improvements: tuple[str, ...] = Field(description="List of specific areas to improve")
+    practice_drills: tuple[str, ...] = Field(description="List of specific practice exercises")
+    pace_score: int = Field(description="Speaking pace score from 1-5", ge=1, le=5)
+    clarity_score: int = Field(description="Clarity score from 1-5", ge=1, le=5)
+    fluency_score: int = Field(description="Fluency score from 1-5", ge=1, le=5)
+    conciseness_score: int = Field(description="Conciseness score from 1-5", ge=1, le=5)
+    overall_score: int = Field(description="Overall score from 1-5", ge=1, le=5)
 
 # Configure page
 st.set_page_config(
@@ -16,6 +95,35 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@njit(cache=True)
+def _aggregate_pauses(starts, ends, threshold):
+    """Sum inter-word gaps and count those exceeding threshold.
+
+    Runs as a single compiled pass over the word-timestamp arrays;
+    cache=True persists the compiled kernel so only the first Streamlit
+    rerun pays the compilation cost.
+    """
+    total_gap = 0.0
+    long_pauses = 0
+    for i in range(1, starts.shape[0]):
+        gap = starts[i] - ends[i - 1]
+        if gap > 0.0:
+            total_gap += gap
+            if gap > threshold:
+                long_pauses += 1
+    return total_gap, long_pauses
+
+@st.cache_resource
+def get_openai_client():
+    """Return a single shared OpenAI client for the whole app process.
+
+    Reusing one client keeps its httpx connection pool (and TLS session)
+    alive across calls. Only the sync client is safe to cache: an async
+    client's pool binds to the event loop that first uses it, and every
+    analysis runs in its own short-lived asyncio.run() loop.
+    """
+    return OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+
 def init_session_state():
     """Initialize session state variables"""
     if 'current_session' not in st.session_state:
@@ -24,34 +132,45 @@ def init_session_state():
         st.session_state.analysis_results = None
     if 'audio_file' not in st.session_state:
         st.session_state.audio_file = None
+    if 'audio_hash' not in st.session_state:
+        st.session_state.audio_hash = None
+    if 'session_start' not in st.session_state:
+        st.session_state.session_start = None
 
-def sidebar_navigation():
-    """Sidebar navigation and session info"""
-    st.sidebar.title("🎤 Speech Coach")
-    
-    # Navigation
-    page = st.sidebar.radio(
-        "Navigate to:",
-        ["Record & Analyze", "Practice History", "Mock Interview", "Settings"]
-    )
-    
-    st.sidebar.divider()
-    
-    # Session info
-    st.sidebar.subheader("Current Session")
+@st.fragment
+def _sidebar_session_info():
+    """Session info and quick stats as a fragment, so its own interactions
+    rerun just this block instead of the whole script.
+
+    Uses bare st.* calls - st.sidebar.* is unsupported inside fragments;
+    the caller places the fragment in the sidebar with `with st.sidebar:`.
+    """
+    st.subheader("Current Session")
     if st.session_state.current_session:
-        st.sidebar.write(f"Session ID: {st.session_state.current_session}")
-        st.sidebar.write(f"Started: {datetime.now().strftime('%H:%M')}")
+        st.write(f"Session ID: {st.session_state.current_session}")
+        st.write(f"Started: {st.session_state.session_start}")
     else:
-        st.sidebar.write("No active session")
-    
+        st.write("No active session")
+
     # Quick stats placeholder
+    st.divider()
+    st.subheader("Quick Stats")
+    st.metric("Sessions Today", "0")
+    st.metric("Avg Score", "N/A")
+    st.metric("Best Improvement", "N/A")
+
+def sidebar_navigation():
+    """Sidebar navigation and session info"""
+    st.sidebar.title("🎤 Speech Coach")
+
+    # Navigation (stays outside the fragment - page routing needs a
+    # full-app rerun)
+    page = st.sidebar.radio("Navigate to:", NAV_PAGES)
+
     st.sidebar.divider()
-    st.sidebar.subheader("Quick Stats")
-    st.sidebar.metric("Sessions Today", "0")
-    st.sidebar.metric("Avg Score", "N/A")
-    st.sidebar.metric("Best Improvement", "N/A")
-    
+    with st.sidebar:
+        _sidebar_session_info()
+
     return page
 
 def record_analyze_page():
@@ -83,20 +202,32 @@ def record_analyze_page():
         if audio_recording is not None:
             st.session_state.audio_file = audio_recording
             st.success("✅ Audio recorded successfully!")
-            st.audio(audio_recording.getvalue())
+            # Pass the UploadedFile itself: Streamlit serves it as a URL
+            # the browser caches, instead of base64-inlining the full
+            # payload into the page on every rerun
+            st.audio(audio_recording)
     
     with col2:
         st.subheader("📁 Upload Audio File")
+        # Only formats libsndfile can decode from memory - the in-memory
+        # librosa path has no audioread/ffmpeg fallback for m4a/webm
         uploaded_file = st.file_uploader(
             "Or upload an existing recording",
-            type=["wav", "mp3", "m4a", "webm", "ogg"],
+            type=["wav", "mp3", "ogg", "flac"],
             help="Max file size: 25MB"
         )
         
+        # Reject oversized files up front - no point copying 25MB+ into
+        # RAM only for Whisper to 413 it
+        if uploaded_file is not None and uploaded_file.size > MAX_UPLOAD_BYTES:
+            st.error("❌ File exceeds the 25MB Whisper API limit")
+            uploaded_file = None
+
         if uploaded_file is not None:
             st.session_state.audio_file = uploaded_file
             st.success("✅ File uploaded successfully!")
-            st.audio(uploaded_file.getvalue())
+            # As above: hand over the file object, not a bytes copy
+            st.audio(uploaded_file)
     
     # Analysis button
     st.divider()
@@ -114,56 +245,188 @@ def record_analyze_page():
     if st.session_state.analysis_results:
         display_analysis_results()
 
+def normalize_inplace(pcm: np.ndarray) -> None:
+    """Peak-normalize the PCM buffer in place.
+
+    One SIMD reduction (peak) plus one in-place multiply - no temporary
+    buffer, so the shared array flows straight into the feature kernels.
+    """
+    peak = np.abs(pcm).max()
+    if peak > 0:
+        pcm *= np.float32(1.0 / peak)
+
+def _decode_audio(audio_bytes: bytes) -> np.ndarray:
+    """Decode to one contiguous float32 16kHz mono buffer.
+
+    This is the only decode in the pipeline - metrics, feature kernels
+    and the Whisper upload all reuse the same array.
+    """
+    pcm, _ = librosa.load(io.BytesIO(audio_bytes), sr=SAMPLE_RATE, mono=True, res_type="soxr_hq")
+    # Auto-normalize (the default in Settings) so quiet recordings get
+    # consistent energy metrics and transcription input
+    normalize_inplace(pcm)
+    return pcm
+
+def _pcm_to_wav(pcm: np.ndarray) -> io.BytesIO:
+    """Encode the shared PCM buffer as an in-memory 16-bit WAV for upload.
+
+    16kHz mono PCM_16 is ~3x smaller than a typical 48kHz stereo source,
+    which keeps uploads well under Whisper's 25MB ceiling.
+    """
+    buf = io.BytesIO()
+    sf.write(buf, pcm, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    buf.seek(0)
+    buf.name = "clip.wav"
+    return buf
+
+def frame_stats(pcm, frame=1024, hop=512):
+    """Per-frame energy and zero-crossing rate in one vectorized pass.
+
+    sliding_window_view is a zero-copy view over the shared PCM buffer,
+    and einsum reduces each frame's dot product in SIMD C loops - no
+    Python-level iteration over the ~2k frames of a 2-minute clip.
+    """
+    n = pcm.shape[0]
+    if n < frame:
+        # Clip shorter than one frame (~64ms at 16kHz): fall back to
+        # whole-clip stats rather than letting sliding_window_view raise
+        if n == 0:
+            return np.zeros(0, dtype=pcm.dtype), np.zeros(0)
+        energy = np.array([np.dot(pcm, pcm)])
+        zcr = np.array([np.count_nonzero(np.diff(np.signbit(pcm))) / n])
+        return energy, zcr
+    strided = np.lib.stride_tricks.sliding_window_view(pcm, frame)[::hop]
+    energy = np.einsum("ij,ij->i", strided, strided)
+    zcr = np.count_nonzero(np.diff(np.signbit(strided), axis=1), axis=1) / frame
+    return energy, zcr
+
+def _compute_local_features(pcm: np.ndarray) -> dict:
+    """Time-domain features computed on the shared PCM buffer"""
+    energy, zcr = frame_stats(pcm)
+    return {
+        "duration": len(pcm) / SAMPLE_RATE,
+        "rms_level": float(np.sqrt(np.mean(pcm * pcm))) if len(pcm) else 0.0,
+        "mean_energy": float(energy.mean()) if energy.size else 0.0,
+        "mean_zcr": float(zcr.mean()) if zcr.size else 0.0
+    }
+
+async def _pipeline(audio_file) -> dict:
+    """Analysis pipeline: transcription and local feature extraction run
+    concurrently, then LLM feedback is generated from the combined metrics."""
+    # A fresh async client per run: each analysis drives its own
+    # asyncio.run() loop, and a cached AsyncOpenAI would keep pooled
+    # connections bound to a previous, already-closed loop
+    async with AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"]) as client:
+        return await _analyze(client, audio_file)
+
+async def _analyze(client, audio_file) -> dict:
+    """Transcribe, extract features and generate feedback with the given client"""
+    # Decode once to the shared 16kHz mono buffer, then overlap the
+    # Whisper upload (of the re-encoded compact WAV) with local feature
+    # extraction in a worker thread
+    audio_file.seek(0)
+    pcm = await asyncio.to_thread(_decode_audio, audio_file.getvalue())
+
+    tr_task = asyncio.create_task(client.audio.transcriptions.create(
+        model="whisper-1",
+        file=_pcm_to_wav(pcm),
+        response_format="verbose_json",
+        timestamp_granularities=["word"]
+    ))
+    feat_task = asyncio.create_task(
+        asyncio.to_thread(_compute_local_features, pcm)
+    )
+    transcript, features = await asyncio.gather(tr_task, feat_task)
+
+    # Pause metrics from the word-level timestamps
+    words = transcript.words or []
+    n_words = len(words)
+    starts = np.fromiter((w.start for w in words), dtype=np.float64, count=n_words)
+    ends = np.fromiter((w.end for w in words), dtype=np.float64, count=n_words)
+    total_gap, long_pauses = _aggregate_pauses(starts, ends, LONG_PAUSE_THRESHOLD)
+    average_pause = total_gap / max(n_words - 1, 1)
+    words_per_minute = n_words / transcript.duration * 60 if transcript.duration else 0
+
+    filler_count = len(FILLER_RE.findall(transcript.text))
+    filler_rate = filler_count / transcript.duration * 60 if transcript.duration else 0
+
+    metrics = {
+        "words_per_minute": round(words_per_minute),
+        "filler_count": filler_count,
+        "filler_rate": filler_rate,  # per minute
+        "average_pause": average_pause,
+        "long_pauses": long_pauses,
+        "total_duration": round(transcript.duration),  # seconds
+        "rms_level": features["rms_level"],
+        "mean_energy": features["mean_energy"],
+        "mean_zcr": features["mean_zcr"]
+    }
+
+    prompt = f"""
+    You are a speech coach analyzing an interview response. Based on the metrics and transcript provided, generate structured feedback.
+
+    METRICS:
+    - Speaking pace: {metrics['words_per_minute']} words per minute
+    - Filler words: {metrics['filler_count']} total
+    - Duration: {metrics['total_duration']} seconds
+    - Average pause: {metrics['average_pause']:.1f} seconds
+    - Long pauses (>{LONG_PAUSE_THRESHOLD:.0f}s): {metrics['long_pauses']}
+    - Vocal energy (RMS of peak-normalized audio): {metrics['rms_level']:.3f}
+
+    TRANSCRIPT:
+    "{transcript.text}"
+
+    Provide coaching feedback focusing on measurable speech delivery aspects only.
+    """
+
+    response = await client.beta.chat.completions.parse(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a professional speech coach focused on measurable delivery aspects."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format=CoachingFeedback,
+    )
+    feedback = response.choices[0].message.parsed
+
+    return {
+        "transcript": transcript.text,
+        "metrics": metrics,
+        "scores": {
+            "pace": feedback.pace_score,
+            "clarity": feedback.clarity_score,
+            "fluency": feedback.fluency_score,
+            "conciseness": feedback.conciseness_score,
+            "overall": feedback.overall_score
+        },
+        "feedback": {
+            "strengths": list(feedback.strengths),
+            "improvements": list(feedback.improvements),
+            "practice_drills": list(feedback.practice_drills)
+        }
+    }
+
+@st.cache_data(ttl=86400, max_entries=64, show_spinner=False)
+def _run_pipeline(audio_hash: str, _audio_file) -> dict:
+    """Run the full analysis pipeline, cached on the audio content hash.
+
+    The hash is the cache key (the underscore tells Streamlit not to hash
+    the file object), so re-analyzing identical audio (e.g. after
+    "Analyze Another") is a dict lookup instead of an API round-trip.
+    """
+    return asyncio.run(_pipeline(_audio_file))
+
 def analyze_audio():
-    """Placeholder for audio analysis pipeline"""
+    """Hash the current audio and run the (cached) analysis pipeline"""
     with st.spinner("Analyzing your speech... This may take a moment."):
-        # TODO: Replace with actual analysis pipeline
-        # 1. Transcribe audio with Whisper API
-        # 2. Extract speech features
-        # 3. Calculate metrics
-        # 4. Generate feedback with LLM
-        
-        # Placeholder results
-        import time
-        time.sleep(2)  # Simulate processing time
-        
-        st.session_state.analysis_results = {
-            "transcript": "Um, so I think my biggest strength is, uh, definitely problem-solving. I really enjoy, like, working through complex challenges and finding creative solutions. You know, in my previous role...",
-            "metrics": {
-                "words_per_minute": 145,
-                "filler_count": 8,
-                "filler_rate": 5.2,  # per minute
-                "average_pause": 0.8,
-                "long_pauses": 3,
-                "total_duration": 92  # seconds
-            },
-            "scores": {
-                "pace": 4,
-                "clarity": 3,
-                "fluency": 2,
-                "conciseness": 3,
-                "overall": 3
-            },
-            "feedback": {
-                "strengths": [
-                    "Good speaking pace - not too fast or slow",
-                    "Clear articulation and pronunciation",
-                    "Confident tone throughout response"
-                ],
-                "improvements": [
-                    "Reduce filler words ('um', 'uh', 'like') - found 8 instances",
-                    "Minimize long pauses to maintain flow",
-                    "Structure response more clearly with specific examples"
-                ],
-                "practice_drills": [
-                    "Re-record this response in under 60 seconds without filler words",
-                    "Practice the STAR method: Situation, Task, Action, Result",
-                    "Record yourself reading for 2 minutes to improve fluency"
-                ]
-            }
-        }
-        
+        audio_file = st.session_state.audio_file
+        audio_hash = audio_key(audio_file.getvalue())
+
+        st.session_state.audio_hash = audio_hash
+        st.session_state.analysis_results = _run_pipeline(audio_hash, audio_file)
+
         st.session_state.current_session = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        st.session_state.session_start = datetime.now().strftime('%H:%M')
         st.success("✅ Analysis complete!")
         st.rerun()
 
@@ -253,32 +516,46 @@ def display_analysis_results():
     
     with col2:
         if st.button("💾 Save Session", use_container_width=True):
+            os.makedirs(SESSIONS_DIR, exist_ok=True)
+            save_session(os.path.join(SESSIONS_DIR, f"{st.session_state.current_session}.json"), results)
             st.success("Session saved to history!")
     
     with col3:
         if st.button("📊 View History", use_container_width=True):
             st.switch_page("Practice History")
 
+# Mock history shown until real session aggregation lands - built once at
+# import rather than on every page visit
+_MOCK_HISTORY_DF = pd.DataFrame({
+    "Date": ["2024-01-15", "2024-01-14", "2024-01-13"],
+    "Duration": ["1:32", "2:05", "1:18"],
+    "Overall Score": [3, 2, 4],
+    "Filler Words": [8, 15, 3],
+    "WPM": [145, 132, 168]
+})
+
+@st.cache_data(persist="disk", ttl=3600)
+def load_history_df(user_id: str) -> pd.DataFrame:
+    """Load and aggregate a user's practice history.
+
+    Cached to disk so the aggregation runs once per hour per user and
+    survives app restarts - this will matter once it reads real session
+    files instead of the mock table.
+    """
+    # TODO: Read saved session JSONs and aggregate per-session metrics,
+    # persisting the aggregate as an Arrow IPC file (pd.read_feather is
+    # zero-copy via mmap) once history grows beyond a handful of sessions
+    return _MOCK_HISTORY_DF
+
 def practice_history_page():
     """Practice history and progress tracking page"""
     st.title("📈 Practice History")
     st.write("Track your progress over time and review past sessions.")
-    
+
     # Placeholder content
     st.info("🚧 Coming soon! This will show your practice history and progress charts.")
-    
-    # Mock history table
-    import pandas as pd
-    
-    mock_data = {
-        "Date": ["2024-01-15", "2024-01-14", "2024-01-13"],
-        "Duration": ["1:32", "2:05", "1:18"],
-        "Overall Score": [3, 2, 4],
-        "Filler Words": [8, 15, 3],
-        "WPM": [145, 132, 168]
-    }
-    
-    df = pd.DataFrame(mock_data)
+
+    df = load_history_df("default")
     st.dataframe(df, use_container_width=True)
 
 def mock_interview_page():
@@ -4,8 +4,6 @@ Run with: streamlit run test_streamlit_audio.py
 """
 
 import streamlit as st
-import tempfile
-import os
 import librosa
 import soundfile as sf
 import numpy as np
@@ -35,21 +33,13 @@ def test_audio_recording():
         
         # Test audio processing
         try:
-            # Save to temporary file for processing
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_file_path = tmp_file.name
-            
-            # Process with librosa
-            audio_data, sample_rate = librosa.load(tmp_file_path, sr=None)
+            # Process with librosa straight from memory - no temp file
+            audio_data, sample_rate = librosa.load(io.BytesIO(audio_bytes), sr=None)
             duration = len(audio_data) / sample_rate
             st.write(f"**Duration:** {duration:.2f} seconds")
             st.write(f"**Sample Rate:** {sample_rate} Hz")
             st.write(f"**Samples:** {len(audio_data)}")
-            
-            # Clean up
-            os.unlink(tmp_file_path)
-            
+
             st.success("✅ Audio processing successful!")
             
         except Exception as e:
@@ -63,10 +53,11 @@ def test_audio_upload():
     
     st.header("📁 Audio File Upload Test")
     
-    # File uploader widget
+    # File uploader widget - only formats libsndfile can decode from
+    # memory (no audioread/ffmpeg fallback for m4a/mp4/webm)
     uploaded_file = st.file_uploader(
         "Upload an audio file",
-        type=["wav", "mp3", "m4a", "mp4", "webm", "ogg"]
+        type=["wav", "mp3", "ogg", "flac"]
     )
     
     if uploaded_file is not None:
@@ -82,33 +73,20 @@ def test_audio_upload():
         
         # Test processing
         try:
-            # Read file bytes
-            file_bytes = uploaded_file.getvalue()
-            
-            # Save to temporary file for processing
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(file_bytes)
-                tmp_file_path = tmp_file.name
-            
-            # Process with librosa
-            audio_data, sample_rate = librosa.load(tmp_file_path, sr=None)
+            # Process with librosa straight from memory - no temp file
+            # (librosa accepts file-like objects via soundfile)
+            # Decode, downmix and resample to 16kHz mono in one pass -
+            # the format Whisper prefers - instead of resampling after
+            audio_data, sample_rate = librosa.load(
+                io.BytesIO(uploaded_file.getvalue()), sr=16000, mono=True, res_type="soxr_hq"
+            )
             duration = len(audio_data) / sample_rate
             st.write(f"**Duration:** {duration:.2f} seconds")
             st.write(f"**Sample Rate:** {sample_rate} Hz")
             st.write(f"**Samples:** {len(audio_data)}")
-            
-            # Test resampling
-            if sample_rate != 16000:
-                st.info("Testing resampling for API compatibility...")
-                audio_16k = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=16000)
-                st.write(f"**Resampled:** 16kHz ({len(audio_16k)} samples)")
-                st.success("✅ Resampling successful!")
-            else:
-                st.success("✅ Audio already at optimal sample rate!")
-            
-            # Clean up
-            os.unlink(tmp_file_path)
-            
+
+            st.success("✅ Audio loaded at API-ready sample rate!")
+
         except Exception as e:
             st.error(f"❌ Audio processing failed: {str(e)}")
     
@@ -123,25 +101,19 @@ def test_audio_playback():
     # Create sample audio data for testing
     if st.button("Generate Test Tone"):
         try:
-            # Generate a simple test tone using numpy
+            # Generate a simple 440Hz sine wave in float32 - half the
+            # bytes of the default float64, and no separate time axis
             duration = 2.0  # seconds
             sample_rate = 22050
-            t = np.linspace(0, duration, int(sample_rate * duration), False)
-            tone = 0.3 * np.sin(440 * 2 * np.pi * t)  # 440Hz sine wave
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                sf.write(tmp_file.name, tone, sample_rate)
-                tmp_file_path = tmp_file.name
-            
-            # Read back as bytes for streamlit
-            with open(tmp_file_path, 'rb') as f:
-                audio_bytes = f.read()
-            
-            os.unlink(tmp_file_path)
-            
+            n = int(sample_rate * duration)
+            tone = 0.3 * np.sin(2 * np.pi * 440 * np.arange(n, dtype=np.float32) / sample_rate)
+
+            # Encode straight to an in-memory WAV - no temp file round-trip
+            buf = io.BytesIO()
+            sf.write(buf, tone.astype(np.float32), sample_rate, format="WAV", subtype="PCM_16")
+
             st.success("✅ Test tone generated!")
-            st.audio(audio_bytes, format="audio/wav")
+            st.audio(buf.getvalue(), format="audio/wav")
             
         except Exception as e:
             st.error(f"❌ Test tone generation failed: {str(e)}")
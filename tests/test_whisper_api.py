@@ -10,19 +10,20 @@ import librosa
 import soundfile as sf
 import tempfile
 
+# Load environment variables once at import
+load_dotenv()
+
+# Single shared client - keeps one httpx connection pool warm for both
+# transcription calls below
+_CLIENT = OpenAI(api_key=os.getenv('OPENAI_API_KEY')) if os.getenv('OPENAI_API_KEY') else None
+
 def test_whisper_api():
     """Test OpenAI Whisper API transcription"""
-    
-    # Load environment variables
-    load_dotenv()
-    
-    # Initialize OpenAI client
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
+
     print("🎤 Testing OpenAI Whisper API...")
-    
+
     # Check if API key is set
-    if not os.getenv('OPENAI_API_KEY'):
+    if _CLIENT is None:
         print("❌ ERROR: OPENAI_API_KEY not found in environment variables")
         print("Please set your API key in .env file")
         return False
@@ -42,7 +43,7 @@ def test_whisper_api():
     try:
         # Test basic transcription
         with open(test_audio_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
+            transcript = _CLIENT.audio.transcriptions.create(
                 model="whisper-1",
                 file=audio_file,
                 response_format="text"
@@ -53,7 +54,7 @@ def test_whisper_api():
         
         # Test with timestamps
         with open(test_audio_path, "rb") as audio_file:
-            transcript_with_timestamps = client.audio.transcriptions.create(
+            transcript_with_timestamps = _CLIENT.audio.transcriptions.create(
                 model="whisper-1",
                 file=audio_file,
                 response_format="verbose_json",
@@ -87,22 +88,16 @@ def test_audio_processing():
         return True
     
     try:
-        # Load audio file
-        audio_data, sample_rate = librosa.load(test_audio_path, sr=None)
-        
+        # Load audio file at 16kHz mono - the format Whisper prefers.
+        # Decode, downmix and resample happen in a single soxr pass
+        # instead of loading at native rate and resampling afterwards.
+        audio_data, sample_rate = librosa.load(test_audio_path, sr=16000, mono=True, res_type="soxr_hq")
+
         print("✅ Audio file loaded successfully:")
         print(f"   Duration: {len(audio_data) / sample_rate:.2f} seconds")
         print(f"   Sample rate: {sample_rate} Hz")
         print(f"   Samples: {len(audio_data)}")
-        
-        # Test conversion to required format (if needed)
-        # Whisper API prefers 16kHz mono
-        if sample_rate != 16000:
-            print("   Resampling to 16kHz...")
-            audio_16k = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=16000)
-            print("✅ Audio resampling successful")
-            print(f"   New sample count: {len(audio_16k)}")
-        
+
         return True
         
     except Exception as e: